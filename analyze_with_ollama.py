@@ -4,22 +4,67 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import io
 import json
+import logging
+import os
+import random
+import re
+import sqlite3
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 try:
-    import requests  # type: ignore
+    import httpx  # type: ignore
 except ImportError as exc:  # pragma: no cover - runtime validation
     raise SystemExit(
-        "The requests package is required. Run inside the ollama container."
+        "The httpx package is required. Run inside the ollama container."
     ) from exc
 
-OLLAMA_BASE_URL = "http://127.0.0.1:11434"
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# orjson parses several times faster than the stdlib and accepts bytes directly.
+json_loads = orjson.loads if orjson is not None else json.loads
+
+logger = logging.getLogger("analyze_with_ollama")
+
+# Same variable the ollama CLI reads; pipeline.slurm points it at the task's own server.
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST") or "127.0.0.1:11434"
+OLLAMA_BASE_URL = OLLAMA_HOST if "://" in OLLAMA_HOST else f"http://{OLLAMA_HOST}"
 DEFAULT_MODEL = "deepseek-r1:32b"
 DEFAULT_THRESHOLD = 75
+# Audio extensions in the order preferred when several share a VTT's stem.
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg")
+# Number of in-flight generate requests. Requests beyond the server's parallel
+# slots simply queue there, so this does not need to track OLLAMA_NUM_PARALLEL.
+DEFAULT_PARALLEL = 4
+
+OLLAMA_TIMEOUT = httpx.Timeout(300, connect=10)
+OLLAMA_LIMITS = httpx.Limits(max_keepalive_connections=40, max_connections=100)
+# Connection-level retries (refused/reset sockets); HTTP errors are not retried.
+OLLAMA_RETRIES = 3
+# Transcripts packed into one prompt when batching; 1 disables packing.
+DEFAULT_BATCH_SIZE = 1
+# Rough prompt budget (~4 characters per token); num_ctx is sized from it.
+DEFAULT_BATCH_TOKENS = 6000
+# Context reserved for a batched reply (reasoning plus one JSON object per file).
+BATCH_REPLY_TOKENS = 2048
+# Transcripts shorter than this are given a zero score without querying Ollama.
+DEFAULT_MIN_CHARS = 200
+# Worker threads reading and filtering VTT files ahead of inference.
+PARSE_WORKERS = 4
+CACHE_FILENAME = ".ollama_cache"
+RESULTS_FILENAME = "analysis_results.json"
+# Records the (mtime, size) of each VTT behind analysis_results.json.
+STATE_FILENAME = ".analysis_state.json"
 
 PROMPT_TEMPLATE = """Analyze this customer service call transcription and provide a detailed scoring breakdown based on the following criteria:
 
@@ -50,124 +95,442 @@ Respond in VALID JSON format with the following keys:
 - 'total_score': Sum of all scores (0-100)
 - 'reasoning': A detailed analysis justifying the scores, explicitly addressing any points deducted."""
 
+# Keys copied from the model's JSON reply, in the order they are reported.
+RESULT_KEYS = (
+    "score_netid",
+    "score_resolution",
+    "score_instruction",
+    "score_zoom",
+    "score_confidentiality",
+    "score_tech_quality",
+    "total_score",  # Will be mapped to 'score' for compatibility
+    "reasoning",
+)
+SCORE_KEYS = RESULT_KEYS[:-1]
+# Upper bound of each score in the prompt's schema; the lower bound is 0.
+SCORE_MAXIMUMS = {
+    "score_netid": 10,
+    "score_resolution": 15,
+    "score_instruction": 15,
+    "score_zoom": 5,
+    "score_confidentiality": 7,
+    "score_tech_quality": 48,
+    "total_score": 100,
+}
+DEFAULT_RESULT: Dict[str, Any] = dict.fromkeys(RESULT_KEYS, 0)
+DEFAULT_RESULT["reasoning"] = ""
+# Set on results that should be recomputed on the next run (e.g. unparsable
+# replies); stripped before results are saved and never recorded as reusable.
+RETRY_KEY = "_retry"
+
+# Split once at import so building a prompt is a plain concatenation rather
+# than re-parsing the template with str.format for every file.
+PROMPT_HEAD, PROMPT_TAIL = PROMPT_TEMPLATE.split("{transcription}")
+
+# Same criteria and keys as PROMPT_TEMPLATE, but scoring several numbered
+# transcriptions at once and answering with one object per transcription.
+BATCH_PROMPT_TEMPLATE = (
+    PROMPT_TEMPLATE.split("Transcription to analyze:")[0]
+    + "Each transcription below is introduced by a '### file_id: <id>' header.\n\n"
+    + "Transcriptions to analyze:\n{transcriptions}\n\n"
+    + "Respond with a VALID JSON array containing one object per transcription, in the same order. "
+    + "Each object must include 'file_id' (the id from its header) and the following keys:\n"
+    + PROMPT_TEMPLATE.split("the following keys:\n", 1)[1]
+)
+BATCH_PROMPT_HEAD, BATCH_PROMPT_TAIL = BATCH_PROMPT_TEMPLATE.split("{transcriptions}")
+
+# Reasoning models (deepseek-r1) think aloud before answering, and the
+# transcript labels they quote there look like JSON arrays.
+THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+class ResponseCache:
+    """SQLite store of raw Ollama replies keyed by a hash of model and prompt."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, reply TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.blake2b(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT reply FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, reply: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO responses (key, reply) VALUES (?, ?)", (key, reply))
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
 
 def wait_for_ollama(max_wait: int = 180, model: str = DEFAULT_MODEL) -> bool:
-    """Poll the Ollama server until the requested model is ready."""
-    print("Waiting for Ollama server...")
-    server_ready = False
+    """Poll the Ollama server until the requested model is ready.
 
-    for second in range(max_wait):
-        try:
-            response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        except requests.RequestException:
-            pass
-        else:
-            if response.status_code == 200:
-                if not server_ready:
-                    print("  Server is online")
-                    server_ready = True
-                models = response.json().get("models", [])
-                available = {model_info.get("name") for model_info in models}
-                if model in available:
-                    print(f"  Model '{model}' detected")
-                    return True
-                if second % 15 == 0:
-                    print(f"  Still waiting for model '{model}' (found: {sorted(available)})")
-        time.sleep(1)
-
-    print("Proceeding without explicit confirmation that the model is ready")
+    Polls start 100 ms apart and back off (with jitter) to at most 2 s, so a
+    server that is already up is detected almost immediately.
+    """
+    logger.info("Waiting for Ollama server...")
+    server_ready = False
+    deadline = time.monotonic() + max_wait
+    last_log = float("-inf")
+    delay = 0.1
+
+    # One keep-alive client so repeated polls reuse the same connection.
+    with httpx.Client(base_url=OLLAMA_BASE_URL, timeout=5) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = client.get("/api/tags")
+            except httpx.HTTPError:
+                pass
+            else:
+                if response.status_code == 200:
+                    if not server_ready:
+                        logger.info("  Server is online")
+                        server_ready = True
+                    models = response.json().get("models", [])
+                    available = {model_info.get("name") for model_info in models}
+                    if model in available:
+                        logger.info("  Model '%s' detected", model)
+                        return True
+                    if time.monotonic() - last_log >= 15:
+                        logger.info("  Still waiting for model '%s' (found: %s)", model, sorted(available))
+                        last_log = time.monotonic()
+            time.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 1.5, 2.0)
+
+    logger.warning("Proceeding without explicit confirmation that the model is ready")
     return False
 
 
 def extract_transcription_text(vtt_path: Path) -> str:
-    raw_text = vtt_path.read_text(encoding="utf-8")
+    """Return the cue text of a VTT file as one space-separated string.
+
+    Lines are filtered while streaming from the file so the raw contents are
+    never held in memory alongside the extracted text.
+    """
     lines = []
-    for line in raw_text.splitlines():
-        if "-->" in line:
-            continue
-        stripped = line.strip()
-        if not stripped or stripped.startswith("WEBVTT"):
-            continue
-        lines.append(stripped)
+    with vtt_path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if "-->" in line:
+                continue
+            stripped = line.strip()
+            if stripped and not stripped.startswith("WEBVTT"):
+                lines.append(stripped)
     return " ".join(lines)
 
 
-def call_ollama(model: str, prompt: str) -> Dict[str, Any]:
-    """Call Ollama and return the parsed JSON response."""
-    response = requests.post(
-        f"{OLLAMA_BASE_URL}/api/generate",
-        json={
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {"temperature": 0.1, "top_p": 0.9},
-        },
-        timeout=300,
-    )
-    response.raise_for_status()
-    payload = response.json()
-    raw_reply = payload.get("response", "")
-
-    # Default fallback values
-    result = {
-        "score_netid": 0,
-        "score_resolution": 0,
-        "score_instruction": 0,
-        "score_zoom": 0,
-        "score_confidentiality": 0,
-        "score_tech_quality": 0,
-        "total_score": 0,  # Will be mapped to 'score' for compatibility
-        "reasoning": raw_reply or "Analysis failed",
-    }
+def extract_json_object(raw_reply: str, opener: str = "{", closer: str = "}") -> Any:
+    """Parse the JSON value embedded in a model reply.
+
+    ``<think>`` blocks are dropped first; the rest may wrap the value in prose
+    or code fences, so the span from the first ``opener`` to the last
+    ``closer`` is parsed.
+    """
+    raw_reply = THINK_BLOCK.sub("", raw_reply)
+    start = raw_reply.index(opener)
+    end = raw_reply.rindex(closer, start) + 1
+    return json_loads(raw_reply[start:end])
+
+
+async def generate(
+    client: httpx.AsyncClient, model: str, prompt: str, num_ctx: Optional[int] = None
+) -> str:
+    """Stream a completion from Ollama and return the concatenated reply text.
+
+    Ollama emits one JSON object per line; reading stops at the ``done``
+    chunk so the full reply is never buffered twice. ``num_ctx`` overrides the
+    server's context length.
+    """
+    options: Dict[str, Any] = {"temperature": 0.1, "top_p": 0.9}
+    if num_ctx is not None:
+        options["num_ctx"] = num_ctx
+    fragments: List[str] = []
+    async with client.stream(
+        "POST",
+        "/api/generate",
+        json={"model": model, "prompt": prompt, "stream": True, "options": options},
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            try:
+                chunk = json_loads(line)
+            except ValueError as exc:
+                # Surface as an HTTP error so callers skip this file, not the folder.
+                raise httpx.DecodingError(f"Malformed stream chunk from Ollama: {exc}") from exc
+            if not isinstance(chunk, dict):
+                raise httpx.DecodingError(f"Unexpected stream chunk from Ollama: {line[:200]}")
+            if "error" in chunk:
+                raise httpx.HTTPError(f"Ollama reported an error: {chunk['error']}")
+            fragments.append(chunk.get("response", ""))
+            if chunk.get("done"):
+                break
+    return "".join(fragments)
+
+
+def default_result(reasoning: str) -> Dict[str, Any]:
+    """Fallback values used when the model omits a key or its reply cannot be parsed."""
+    result = DEFAULT_RESULT.copy()
+    result["reasoning"] = reasoning
+    return result
+
+
+def merge_scores(result: Dict[str, Any], parsed: Dict[str, Any]) -> None:
+    # Update result with parsed values, keeping defaults if missing or null.
+    # Scores are normalised to ints here once ("9", 14.0 -> 9, 14) and clamped
+    # to the schema range, so later consumers (and orjson's 64-bit ints) can
+    # rely on the schema.
+    for key in SCORE_KEYS:
+        value = parsed.get(key)
+        if value is None:
+            continue
+        try:
+            result[key] = int(round(min(max(float(value), 0.0), SCORE_MAXIMUMS[key])))
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+    if parsed.get("reasoning") is not None:
+        result["reasoning"] = parsed["reasoning"]
+
+    # Handle potential nested reasoning structure (legacy handling)
+    reasoning = result.get("reasoning")
+    if isinstance(reasoning, dict):
+         logger.warning("  Warning: Received nested dict structure in reasoning field: %s", reasoning)
+         # functionality to extract score from nested dict is deprecated with new schema, 
+         # but we keep simple string extraction
+         result["reasoning"] = str(reasoning)
 
-    try:
-        start = raw_reply.index("{")
-        end = raw_reply.rindex("}") + 1
-        parsed = json.loads(raw_reply[start:end])
-        
-        if isinstance(parsed, dict):
-            # Update result with parsed values, keeping defaults if missing
-            for key in result.keys():
-                if key in parsed:
-                    result[key] = parsed[key]
-            
-            # Handle potential nested reasoning structure (legacy handling)
-            reasoning = result.get("reasoning")
-            if isinstance(reasoning, dict):
-                 print(f"  Warning: Received nested dict structure in reasoning field: {reasoning}")
-                 # functionality to extract score from nested dict is deprecated with new schema, 
-                 # but we keep simple string extraction
-                 result["reasoning"] = str(reasoning)
 
+async def call_ollama(
+    client: httpx.AsyncClient,
+    model: str,
+    prompt: str,
+    cache: Optional[ResponseCache] = None,
+    num_ctx: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Call Ollama and return the parsed JSON response.
+
+    When a cache is supplied, a stored reply for the same model and prompt is
+    reused instead of querying the server; fresh replies are stored once they
+    parse successfully.
+    """
+    cache_key = ResponseCache.key(model, prompt) if cache is not None else ""
+    raw_reply = cache.get(cache_key) if cache is not None else None
+    fresh = raw_reply is None
+
+    if raw_reply is None:
+        raw_reply = await generate(client, model, prompt, num_ctx)
+
+    result = default_result(raw_reply or "Analysis failed")
+
+    try:
+        parsed = extract_json_object(raw_reply)
     except (ValueError, json.JSONDecodeError) as exc:
-        print(f"  Warning: Failed to parse JSON response: {exc}")
-        print(f"  Raw reply: {raw_reply[:200]}...")
-        
+        logger.warning("  Warning: Failed to parse JSON response: %s", exc)
+        logger.warning("  Raw reply: %s...", raw_reply[:200])
+        parsed = None
+
+    if isinstance(parsed, dict):
+        merge_scores(result, parsed)
+        if cache is not None and fresh:
+            cache.put(cache_key, raw_reply)
+    else:
+        # Keep the zero-score placeholder for this run, but score it again next time.
+        result[RETRY_KEY] = True
+
     return result
 
 
-def analyze_transcription_file(vtt_file: Path, model: str) -> Optional[Dict[str, Any]]:
+async def call_ollama_batch(
+    client: httpx.AsyncClient,
+    model: str,
+    transcriptions: List[str],
+    cache: Optional[ResponseCache] = None,
+    num_ctx: Optional[int] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """Score several transcriptions with one packed prompt.
+
+    Transcriptions are numbered from 1 and matched back by ``file_id``;
+    entries the model skipped or mangled come back as ``None`` so the caller
+    can retry them individually.
+    """
+    sections = "\n".join(
+        f"### file_id: {number}\n{transcription}\n"
+        for number, transcription in enumerate(transcriptions, start=1)
+    )
+    prompt = f"{BATCH_PROMPT_HEAD}{sections}{BATCH_PROMPT_TAIL}"
+
+    cache_key = ResponseCache.key(model, prompt) if cache is not None else ""
+    raw_reply = cache.get(cache_key) if cache is not None else None
+    fresh = raw_reply is None
+
+    if raw_reply is None:
+        raw_reply = await generate(client, model, prompt, num_ctx)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(transcriptions)
+    try:
+        parsed = extract_json_object(raw_reply, "[", "]")
+    except ValueError as exc:
+        logger.warning("  Warning: Failed to parse batched JSON response: %s", exc)
+        return results
+    if not isinstance(parsed, list):
+        return results
+
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("file_id")) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < len(results) and results[index] is None:
+            result = default_result("Analysis failed")
+            merge_scores(result, item)
+            results[index] = result
+
+    if cache is not None and fresh and all(result is not None for result in results):
+        cache.put(cache_key, raw_reply)
+    return results
+
+
+def load_transcription(vtt_file: Path) -> Optional[str]:
+    """Return the transcript text, or ``None`` if it is unreadable or empty."""
     try:
         transcription = extract_transcription_text(vtt_file)
     except OSError as exc:
-        print(f"  Failed to read {vtt_file}: {exc}")
+        logger.error("  Failed to read %s: %s", vtt_file, exc)
         return None
 
     if not transcription.strip():
-        print(f"  Skipping {vtt_file.name}: empty transcript")
+        logger.info("  Skipping %s: empty transcript", vtt_file.name)
+        return None
+    return transcription
+
+
+async def analyze_transcription_file(
+    vtt_file: Path,
+    model: str,
+    client: httpx.AsyncClient,
+    audio_index: Dict[str, str],
+    cache: Optional[ResponseCache] = None,
+    transcription: Optional[str] = None,
+    num_ctx: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    if transcription is None:
+        transcription = load_transcription(vtt_file)
+        if transcription is None:
+            return None
+
+    prompt = f"{PROMPT_HEAD}{transcription}{PROMPT_TAIL}"
+
+    started = time.perf_counter()
+    try:
+        analysis_result = await call_ollama(client, model, prompt, cache, num_ctx)
+    except httpx.HTTPError as exc:
+        logger.error("  Ollama request for %s failed: %s", vtt_file.name, exc)
         return None
+    logger.debug("  Ollama call for %s took %.2fs", vtt_file.name, time.perf_counter() - started)
+
+    return build_analysis(vtt_file, transcription, analysis_result, audio_index)
 
-    prompt = PROMPT_TEMPLATE.format(transcription=transcription)
 
+async def analyze_transcription_batch(
+    batch: List[Tuple[Path, str]],
+    model: str,
+    client: httpx.AsyncClient,
+    audio_index: Dict[str, str],
+    cache: Optional[ResponseCache] = None,
+    num_ctx: Optional[int] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """Analyze a packed batch, falling back to per-file calls for missing entries."""
+    started = time.perf_counter()
     try:
-        analysis_result = call_ollama(model, prompt)
-    except requests.RequestException as exc:
-        print(f"  Ollama request for {vtt_file.name} failed: {exc}")
+        batch_results = await call_ollama_batch(
+            client, model, [transcription for _, transcription in batch], cache, num_ctx
+        )
+    except httpx.HTTPError as exc:
+        logger.error("  Batched Ollama request failed: %s", exc)
+        batch_results = [None] * len(batch)
+    logger.debug(
+        "  Batched Ollama call for %d files took %.2fs", len(batch), time.perf_counter() - started
+    )
+
+    analyses: List[Optional[Dict[str, Any]]] = []
+    for (vtt_file, transcription), analysis_result in zip(batch, batch_results):
+        if analysis_result is None:
+            logger.info("  Retrying %s on its own", vtt_file.name)
+            analyses.append(
+                await analyze_transcription_file(
+                    vtt_file, model, client, audio_index, cache, transcription, num_ctx
+                )
+            )
+        else:
+            analyses.append(build_analysis(vtt_file, transcription, analysis_result, audio_index))
+    return analyses
+
+
+def batch_context_length(batch_tokens: int) -> int:
+    """Context length that fits a packed prompt of ``batch_tokens`` and its reply.
+
+    Rounded up to a multiple of 1024; one value is used for the whole run
+    because Ollama reloads the model whenever ``num_ctx`` changes.
+    """
+    overhead = len(BATCH_PROMPT_HEAD + BATCH_PROMPT_TAIL) // 4
+    tokens = batch_tokens + overhead + BATCH_REPLY_TOKENS
+    return -(-tokens // 1024) * 1024
+
+
+def pack_batches(
+    items: List[Tuple[Path, str]], batch_size: int, batch_tokens: int
+) -> List[List[Tuple[Path, str]]]:
+    """Group transcripts greedily by count and estimated token size (~4 chars/token)."""
+    batches: List[List[Tuple[Path, str]]] = []
+    current: List[Tuple[Path, str]] = []
+    current_tokens = 0
+    for item in items:
+        tokens = len(item[1]) // 4
+        if current and (len(current) >= batch_size or current_tokens + tokens > batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def short_transcript_analysis(
+    vtt_file: Path, transcription: str, min_chars: int, audio_index: Dict[str, str]
+) -> Optional[Dict[str, Any]]:
+    """Return a zero-score analysis if the transcript is too short to be worth scoring."""
+    if len(transcription) >= min_chars:
         return None
+    logger.info(
+        "  Skipping inference for %s: transcript under %d characters", vtt_file.name, min_chars
+    )
+    return build_analysis(
+        vtt_file, transcription, default_result("Transcript too short for analysis"), audio_index
+    )
 
+
+def build_analysis(
+    vtt_file: Path,
+    transcription: str,
+    analysis_result: Dict[str, Any],
+    audio_index: Dict[str, str],
+) -> Dict[str, Any]:
     # Merge file metadata with analysis results
     return {
-        "audio_file": discover_audio_name(vtt_file),
+        "audio_file": discover_audio_name(vtt_file, audio_index),
         "transcription_file": vtt_file.name,
         **analysis_result,
         "score": analysis_result.get("total_score", 0), # Backwards compatibility
@@ -175,83 +538,313 @@ def analyze_transcription_file(vtt_file: Path, model: str) -> Optional[Dict[str,
     }
 
 
-def discover_audio_name(vtt_file: Path) -> str:
-    candidates = [vtt_file.with_suffix(ext) for ext in (".wav", ".mp3", ".m4a", ".flac", ".ogg")]
-    for candidate in candidates:
-        if candidate.exists():
-            return candidate.name
-    return vtt_file.stem
+def scan_speaker_folder(folder: Path) -> Tuple[List[Path], Dict[str, str]]:
+    """List VTT files and index audio files by stem in a single directory read.
+
+    Returns the VTT paths sorted by name and a map from audio stem to file name.
+    """
+    ranks = {ext: rank for rank, ext in enumerate(AUDIO_EXTENSIONS)}
+    vtt_entries: List[os.DirEntry] = []
+    index: Dict[str, str] = {}
+    best: Dict[str, int] = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".vtt":
+                if entry.is_file():
+                    vtt_entries.append(entry)
+                continue
+            rank = ranks.get(ext.lower())
+            if rank is None or not entry.is_file():
+                continue
+            if rank < best.get(stem, len(AUDIO_EXTENSIONS)):
+                best[stem] = rank
+                index[stem] = entry.name
+    vtt_entries.sort(key=lambda entry: entry.name)
+    return [Path(entry.path) for entry in vtt_entries], index
+
+
+def discover_audio_name(vtt_file: Path, audio_index: Dict[str, str]) -> str:
+    return audio_index.get(vtt_file.stem, vtt_file.stem)
 
 
 def generate_markdown_report(folder: Path, results: Dict[str, Dict[str, Any]]) -> None:
-    """Generate a readable Markdown summary of the analysis results."""
+    """Generate a readable Markdown summary of the analysis results.
+
+    The summary table and detailed sections are filled in a single pass over
+    ``results`` into two buffers that are concatenated at the end.
+    """
     report_path = folder / "analysis_report.md"
-    
-    lines = [
-        "# Call Analysis Report",
-        f"\n**Date:** {time.strftime('%Y-%m-%d %H:%M:%S')}",
-        f"**Total Calls Analyzed:** {len(results)}",
-        "\n## Summary Table",
-        "\n| File | Score | Reasoning |",
-        "|---|---|---|",
-    ]
-    
-    for filename, data in results.items():
-        score = data.get("total_score", 0)
-        # Truncate reasoning for table
-        reasoning = str(data.get("reasoning", "")).replace("\n", " ")
-        short_reasoning = (reasoning[:100] + "...") if len(reasoning) > 100 else reasoning
-        lines.append(f"| {filename} | {score} | {short_reasoning} |")
-        
-    lines.append("\n## Detailed Analysis")
-    
+
+    summary = io.StringIO()
+    summary.write(
+        "# Call Analysis Report"
+        f"\n\n**Date:** {time.strftime('%Y-%m-%d %H:%M:%S')}"
+        f"\n**Total Calls Analyzed:** {len(results)}"
+        "\n\n## Summary Table"
+        "\n\n| File | Score | Reasoning |"
+        "\n|---|---|---|"
+    )
+    details = io.StringIO()
+    details.write("\n\n## Detailed Analysis")
+
     for filename, data in results.items():
-        lines.append(f"\n### {filename}")
-        lines.append(f"\n**Audio Source:** `{data.get('audio_file', 'Unknown')}`")
-        lines.append(f"**Total Score:** {data.get('total_score', 0)} / 100")
-        
-        lines.append("\n**Score Breakdown:**")
-        lines.append(f"- NetID Acquisition: {data.get('score_netid', 0)}/10")
-        lines.append(f"- Issue Resolution: {data.get('score_resolution', 0)}/15")
-        lines.append(f"- Instructions: {data.get('score_instruction', 0)}/15")
-        lines.append(f"- Zoom Usage: {data.get('score_zoom', 0)}/5")
-        lines.append(f"- Confidentiality: {data.get('score_confidentiality', 0)}/7")
-        lines.append(f"- Technical Quality: {data.get('score_tech_quality', 0)}/48")
-        
-        lines.append("\n**Reasoning:**")
-        lines.append(f"{data.get('reasoning', 'No reasoning provided')}")
-        lines.append("\n---")
-        
+        total_score = data["total_score"]
+        reasoning = data["reasoning"]
+
+        # Truncate reasoning for table before cleaning it, so only the kept
+        # prefix is scanned; escape pipes so they cannot split table cells.
+        full_reasoning = str(reasoning)
+        short_reasoning = full_reasoning[:100].replace("\n", " ").replace("|", "\\|")
+        if len(full_reasoning) > 100:
+            short_reasoning += "..."
+        summary.write(f"\n| {filename} | {total_score} | {short_reasoning} |")
+
+        details.write(
+            f"\n\n### {filename}"
+            f"\n\n**Audio Source:** `{data['audio_file']}`"
+            f"\n**Total Score:** {total_score} / 100"
+            "\n\n**Score Breakdown:**"
+            f"\n- NetID Acquisition: {data['score_netid']}/10"
+            f"\n- Issue Resolution: {data['score_resolution']}/15"
+            f"\n- Instructions: {data['score_instruction']}/15"
+            f"\n- Zoom Usage: {data['score_zoom']}/5"
+            f"\n- Confidentiality: {data['score_confidentiality']}/7"
+            f"\n- Technical Quality: {data['score_tech_quality']}/48"
+            "\n\n**Reasoning:**"
+            f"\n{reasoning}"
+            "\n\n---"
+        )
+
+    summary.write(details.getvalue())
+
     try:
-        report_path.write_text("\n".join(lines), encoding="utf-8")
-        print(f"Generated Markdown report at {report_path}")
+        report_path.write_text(summary.getvalue(), encoding="utf-8")
+        logger.info("Generated Markdown report at %s", report_path)
     except OSError as e:
-        print(f"Failed to write markdown report: {e}")
+        logger.error("Failed to write markdown report: %s", e)
+
+
+def write_json_atomic(path: Path, data: Any, indent: bool = True) -> None:
+    """Serialise ``data`` to a temporary sibling file, then rename it over ``path``.
+
+    Readers such as submit_slurm.py never observe a half-written file.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    else:
+        payload = json.dumps(data, indent=2 if indent else None).encode("utf-8")
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+
+
+def file_signature(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
 
 
-def analyze_speaker_folder(folder: Path, model: str, threshold: int) -> Dict[str, Dict[str, Any]]:
-    wait_for_ollama(model=model)
+def analysis_fingerprint(model: str, min_chars: int) -> str:
+    """Identify the model, prompt and short-transcript cutoff behind a set of results."""
+    return hashlib.blake2b(
+        f"{model}\0{min_chars}\0{PROMPT_TEMPLATE}".encode("utf-8")
+    ).hexdigest()
+
+
+def load_unchanged_results(
+    folder: Path, model: str, signatures: Dict[str, List[int]], min_chars: int
+) -> Dict[str, Dict[str, Any]]:
+    """Return previous results for VTT files untouched since the last run.
+
+    Entries are reused only when the model, prompt and ``--min-chars`` cutoff
+    match the recorded fingerprint and the file's mtime and size are unchanged.
+    """
+    try:
+        state = json_loads((folder / STATE_FILENAME).read_bytes())
+        previous = json_loads((folder / RESULTS_FILENAME).read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or not isinstance(previous, dict):
+        return {}
+    if state.get("fingerprint") != analysis_fingerprint(model, min_chars):
+        return {}
+
+    recorded = state.get("files", {})
+    return {
+        name: previous[name]
+        for name, signature in signatures.items()
+        if name in previous and recorded.get(name) == signature
+    }
+
 
+def save_analysis_state(
+    folder: Path,
+    model: str,
+    signatures: Dict[str, List[int]],
+    results: Dict[str, Dict[str, Any]],
+    min_chars: int,
+    retry: Optional[Set[str]] = None,
+) -> None:
+    """Record the files whose results may be reused; ``retry`` names are left out."""
+    retry = retry or set()
+    state = {
+        "fingerprint": analysis_fingerprint(model, min_chars),
+        "files": {
+            name: signatures[name] for name in results if name in signatures and name not in retry
+        },
+    }
+    try:
+        write_json_atomic(folder / STATE_FILENAME, state, indent=False)
+    except OSError as exc:
+        logger.error("Failed to record analysis state: %s", exc)
+
+
+async def analyze_files(
+    vtt_files: List[Path],
+    model: str,
+    parallel: int,
+    audio_index: Dict[str, str],
+    cache: Optional[ResponseCache] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    min_chars: int = DEFAULT_MIN_CHARS,
+) -> List[Optional[Dict[str, Any]]]:
+    """Analyze VTT files concurrently, keeping at most ``parallel`` requests in flight.
+
+    With ``batch_size`` above 1, transcripts are packed into shared prompts
+    of up to ``batch_size`` files and roughly ``batch_tokens`` tokens.
+    Transcripts shorter than ``min_chars`` get a zero-score stub instead.
+    """
+    semaphore = asyncio.Semaphore(max(1, parallel))
+    loop = asyncio.get_running_loop()
+
+    transport = httpx.AsyncHTTPTransport(limits=OLLAMA_LIMITS, retries=OLLAMA_RETRIES)
+    with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as parse_pool:
+        async with httpx.AsyncClient(
+            base_url=OLLAMA_BASE_URL, timeout=OLLAMA_TIMEOUT, transport=transport
+        ) as client:
+
+            # Transcripts are parsed in the pool outside the semaphore, so reading
+            # the next files overlaps with inference on the current ones.
+            async def bounded(vtt_file: Path) -> Optional[Dict[str, Any]]:
+                transcription = await loop.run_in_executor(parse_pool, load_transcription, vtt_file)
+                if transcription is None:
+                    return None
+                stub = short_transcript_analysis(vtt_file, transcription, min_chars, audio_index)
+                if stub is not None:
+                    return stub
+                async with semaphore:
+                    logger.info("Analyzing %s", vtt_file.name)
+                    return await analyze_transcription_file(
+                        vtt_file, model, client, audio_index, cache, transcription
+                    )
+
+            if batch_size <= 1:
+                return await asyncio.gather(*(bounded(vtt_file) for vtt_file in vtt_files))
+
+            num_ctx = batch_context_length(batch_tokens)
+
+            async def bounded_batch(batch: List[Tuple[Path, str]]) -> List[Optional[Dict[str, Any]]]:
+                async with semaphore:
+                    if len(batch) == 1:
+                        # Leftovers and oversized transcripts: the array prompt buys
+                        # nothing and risks a plain-object reply being scored twice.
+                        vtt_file, transcription = batch[0]
+                        logger.info("Analyzing %s", vtt_file.name)
+                        return [
+                            await analyze_transcription_file(
+                                vtt_file, model, client, audio_index, cache, transcription, num_ctx
+                            )
+                        ]
+                    logger.info("Analyzing batch: %s", ", ".join(vtt_file.name for vtt_file, _ in batch))
+                    return await analyze_transcription_batch(
+                        batch, model, client, audio_index, cache, num_ctx
+                    )
+
+            transcriptions = await asyncio.gather(
+                *(
+                    loop.run_in_executor(parse_pool, load_transcription, vtt_file)
+                    for vtt_file in vtt_files
+                )
+            )
+            by_name: Dict[str, Optional[Dict[str, Any]]] = {}
+            loaded = []
+            for vtt_file, transcription in zip(vtt_files, transcriptions):
+                if transcription is None:
+                    continue
+                stub = short_transcript_analysis(vtt_file, transcription, min_chars, audio_index)
+                if stub is not None:
+                    by_name[vtt_file.name] = stub
+                else:
+                    loaded.append((vtt_file, transcription))
+            batches = pack_batches(loaded, batch_size, batch_tokens)
+            batch_results = await asyncio.gather(*(bounded_batch(batch) for batch in batches))
+
+            for batch, analyses in zip(batches, batch_results):
+                for (vtt_file, _), analysis in zip(batch, analyses):
+                    by_name[vtt_file.name] = analysis
+            return [by_name.get(vtt_file.name) for vtt_file in vtt_files]
+
+
+def analyze_speaker_folder(
+    folder: Path,
+    model: str,
+    threshold: int,
+    parallel: int = DEFAULT_PARALLEL,
+    use_cache: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batch_tokens: int = DEFAULT_BATCH_TOKENS,
+    min_chars: int = DEFAULT_MIN_CHARS,
+) -> Dict[str, Dict[str, Any]]:
     results: Dict[str, Dict[str, Any]] = {}
-    vtt_files = sorted(folder.glob("*.vtt"))
+    vtt_files, audio_index = scan_speaker_folder(folder)
     if not vtt_files:
-        print(f"No VTT files found in {folder}")
+        logger.warning("No VTT files found in %s", folder)
         return results
 
+    signatures = {vtt_file.name: file_signature(vtt_file) for vtt_file in vtt_files}
+    reused = load_unchanged_results(folder, model, signatures, min_chars) if use_cache else {}
+    if reused:
+        logger.info("Reusing %d unchanged analyses from %s", len(reused), RESULTS_FILENAME)
+    pending = [vtt_file for vtt_file in vtt_files if vtt_file.name not in reused]
+
+    analyses: Dict[str, Optional[Dict[str, Any]]] = {}
+    if pending:
+        wait_for_ollama(model=model)
+        cache = ResponseCache(folder / CACHE_FILENAME) if use_cache else None
+        try:
+            fresh = asyncio.run(
+                analyze_files(
+                    pending,
+                    model,
+                    parallel,
+                    audio_index,
+                    cache,
+                    batch_size,
+                    batch_tokens,
+                    min_chars,
+                )
+            )
+        finally:
+            if cache is not None:
+                cache.close()
+        analyses = dict(zip((vtt_file.name for vtt_file in pending), fresh))
+
     for vtt_file in vtt_files:
-        print(f"Analyzing {vtt_file.name}")
-        analysis = analyze_transcription_file(vtt_file, model)
+        analysis = reused.get(vtt_file.name) or analyses.get(vtt_file.name)
         if analysis is None:
             continue
         results[vtt_file.name] = analysis
 
     if not results:
-        print("No transcription analyses were successful")
+        logger.warning("No transcription analyses were successful")
         return results
 
-    output_path = folder / "analysis_results.json"
-    output_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
-    print(f"Saved consolidated results to {output_path}")
+    retry = {name for name, analysis in results.items() if analysis.pop(RETRY_KEY, False)}
+    output_path = folder / RESULTS_FILENAME
+    write_json_atomic(output_path, results)
+    logger.info("Saved consolidated results to %s", output_path)
+    save_analysis_state(folder, model, signatures, results, min_chars, retry)
     
     # Generate human-readable report
     generate_markdown_report(folder, results)
@@ -269,16 +862,65 @@ def parse_cli() -> argparse.Namespace:
         default=DEFAULT_THRESHOLD,
         help="Score threshold (kept for compatibility; not used directly here)",
     )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=DEFAULT_PARALLEL,
+        help=f"Concurrent Ollama requests (default: {DEFAULT_PARALLEL})",
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=f"Reuse stored replies for unchanged prompts from {CACHE_FILENAME} (default: enabled)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Transcripts packed into one prompt (default: 1, no packing)",
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=DEFAULT_BATCH_TOKENS,
+        help="Approximate token budget per packed prompt; sets the request context length",
+    )
+    parser.add_argument(
+        "--min-chars",
+        type=int,
+        default=DEFAULT_MIN_CHARS,
+        help="Score transcripts shorter than this as 0 without calling Ollama (default: 200)",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log per-request timings",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_cli()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s", stream=sys.stdout)
+    # httpx logs every request at INFO; only surface its warnings.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
     speaker_folder = args.speaker_folder.expanduser().resolve()
     if not speaker_folder.exists():
         raise SystemExit(f"Speaker folder not found: {speaker_folder}")
 
-    analyze_speaker_folder(speaker_folder, args.model, args.threshold)
+    analyze_speaker_folder(
+        speaker_folder,
+        args.model,
+        args.threshold,
+        args.parallel,
+        args.cache,
+        args.batch_size,
+        args.batch_tokens,
+        args.min_chars,
+    )
 
 
 if __name__ == "__main__":
@@ -25,16 +25,55 @@ import argparse
 import json
 import os
 import shutil
+import socket
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import ijson  # type: ignore
+except ImportError:  # optional; fall back to loading the whole file
+    ijson = None
 
 AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".flac", ".ogg", ".wmv", ".avi", ".mp4")
+AUDIO_SET = frozenset(AUDIO_EXTENSIONS)
 DEFAULT_SCORE_THRESHOLD = 75
 DEFAULT_GPU_PARTITION = "gpu-rtx6k"
 DEFAULT_JOB_TIME = "02:00:00"
+MANIFEST_FILENAME = "speaker_folders.txt"
+ARRAY_JOB_NAME = "speaker_pipeline"
+PIPELINE_SCRIPT = "pipeline.slurm"
+OLLAMA_REGISTRY = "registry.ollama.ai"
+COPY_WORKERS = 16
+POLL_MIN_SECONDS = 5
+POLL_MAX_SECONDS = 180
+USER_QUEUE_EVERY_SECONDS = 1800
+# Run inside the Ollama image by ensure_ollama_model. Paths and the model name
+# arrive through the environment, so no value is ever parsed as shell syntax.
+OLLAMA_PULL_SCRIPT = """
+ollama serve >"$SERVE_LOG" 2>&1 &
+SERVE_PID=$!
+trap 'kill $SERVE_PID 2>/dev/null || true' EXIT
+for i in $(seq 60); do
+    curl -s "http://$OLLAMA_HOST/api/tags" >/dev/null 2>&1 && break
+    if ! kill -0 $SERVE_PID 2>/dev/null || [[ $i -eq 60 ]]; then
+        echo "ollama serve did not come up; see $SERVE_LOG" >&2
+        exit 1
+    fi
+    sleep 1
+done
+ollama pull "$MODEL"
+"""
+
+
+def free_local_port() -> int:
+    """Return a loopback TCP port that is free right now."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
 
 
 @dataclass
@@ -43,12 +82,14 @@ class ContainerConfig:
     whisperx_image: Path
     ollama_image: Path
     ollama_model: str
+    ollama_models: Path
     partition: str = DEFAULT_GPU_PARTITION
     gpus_per_job: int = 1
     mem_gb: int = 81
     time_limit: str = DEFAULT_JOB_TIME
     account: Optional[str] = None
     qos: Optional[str] = None
+    max_concurrent_tasks: Optional[int] = None
 
 
 class SpeakerAnalysisOrchestrator:
@@ -59,6 +100,9 @@ class SpeakerAnalysisOrchestrator:
         self.config = config
         self.job_ids: List[str] = []
         self.speaker_folders: List[Path] = []
+        # Resolve the Slurm clients once so each call skips the PATH search.
+        self.sbatch = shutil.which("sbatch")
+        self.squeue = shutil.which("squeue") or "squeue"
 
     # --- Discovery -----------------------------------------------------------------
 
@@ -68,162 +112,167 @@ class SpeakerAnalysisOrchestrator:
         for entry in sorted(self.base_dir.iterdir()):
             if not entry.is_dir() or entry.name.startswith("."):
                 continue
-            audio_files = [f for f in entry.rglob("*") if f.suffix.lower() in AUDIO_EXTENSIONS]
-            if audio_files:
+            audio_count = sum(1 for _ in self._iter_audio_files(str(entry)))
+            if audio_count:
                 folders.append(entry)
-                print(f"  {entry.name}: {len(audio_files)} audio files")
+                print(f"  {entry.name}: {audio_count} audio files")
         self.speaker_folders = folders
         print(f"Total speaker folders: {len(self.speaker_folders)}")
         return folders
 
-    # --- Job script generation ------------------------------------------------------
-
-    def create_slurm_job_script(self, speaker_folder: Path) -> Path:
-        job_name = f"{speaker_folder.name}_pipeline"
-        script_path = self.base_dir / f"{job_name}.slurm"
-        repo_root = self.config.repo_root
-        whisperx_image = self.config.whisperx_image
-        ollama_image = self.config.ollama_image
-        model_name = self.config.ollama_model
-
-        account_line = f"#SBATCH --account={self.config.account}" if self.config.account else ""
-
-        # Auto-determine QoS if not explicitly set
+    @classmethod
+    def _iter_audio_files(cls, folder: str) -> Iterator[str]:
+        """Yield audio file paths under ``folder`` without building Path objects."""
+        try:
+            entries = os.scandir(folder)
+        except PermissionError:
+            # Skip unreadable directories, as Path.rglob does.
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from cls._iter_audio_files(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in AUDIO_SET:
+                    yield entry.path
+
+    # --- Model preparation ----------------------------------------------------------
+
+    def ollama_manifest_path(self) -> Path:
+        """Location of the model's manifest inside the shared OLLAMA_MODELS store."""
+        name, _, tag = self.config.ollama_model.partition(":")
+        parts = name.split("/")
+        if len(parts) == 1:
+            parts = [OLLAMA_REGISTRY, "library", *parts]
+        elif len(parts) == 2:
+            parts = [OLLAMA_REGISTRY, *parts]
+        return self.config.ollama_models.joinpath("manifests", *parts, tag or "latest")
+
+    def ensure_ollama_model(self) -> bool:
+        """Pull the model into the shared store once, before any job is queued."""
+        model = self.config.ollama_model
+        models_dir = self.config.ollama_models
+        if self.ollama_manifest_path().is_file():
+            print(f"Ollama model {model} already cached in {models_dir}")
+            return True
+        if shutil.which("apptainer") is None:
+            print(f"apptainer not found; pull {model} into {models_dir} first (see download_model.slurm)")
+            return False
+
+        print(f"Pulling Ollama model {model} into {models_dir} ...")
+        models_dir.mkdir(parents=True, exist_ok=True)
+        logs_dir = self.base_dir / "logs"
+        serve_log = logs_dir / "ollama_pull_serve.log"
+        # A private port keeps the pull away from any other server on this host.
+        host = f"127.0.0.1:{free_local_port()}"
+        env = os.environ.copy()
+        env.update(
+            OLLAMA_HOST=host,
+            OLLAMA_MODELS=str(models_dir),
+            MODEL=model,
+            SERVE_LOG=str(serve_log),
+        )
+        result = subprocess.run(
+            [
+                "apptainer",
+                "exec",
+                "--bind",
+                f"{models_dir}:{models_dir}",
+                "--bind",
+                f"{logs_dir}:{logs_dir}",
+                str(self.config.ollama_image),
+                "bash",
+                "-c",
+                OLLAMA_PULL_SCRIPT,
+            ],
+            env=env,
+            check=False,
+        )
+        if result.returncode != 0:
+            print(f"Failed to pull {model}")
+            return False
+        if not self.ollama_manifest_path().is_file():
+            print(f"Pull finished but {model} is still missing from {models_dir}")
+            return False
+        return True
+
+    # --- Job preparation ------------------------------------------------------------
+
+    def write_speaker_manifest(self) -> Path:
+        manifest_path = self.base_dir / MANIFEST_FILENAME
+        manifest_path.write_text(
+            "".join(f"{folder}\n" for folder in self.speaker_folders),
+            encoding="utf-8",
+        )
+        return manifest_path
+
+    def resolve_qos(self) -> Optional[str]:
         if self.config.qos:
-            qos_line = f"#SBATCH --qos={self.config.qos}"
-        elif self.config.account and self.config.partition.startswith("gpu-"):
+            return self.config.qos
+        if self.config.account and self.config.partition.startswith("gpu-"):
             # Format: {account}-gpu-{gpu_type}
             gpu_type = self.config.partition.replace("gpu-", "")
-            auto_qos = f"{self.config.account}-gpu-{gpu_type}"
-            qos_line = f"#SBATCH --qos={auto_qos}"
-        else:
-            qos_line = ""
-
-        script = f"""#!/bin/bash
-#SBATCH --job-name={job_name}
-#SBATCH --partition={self.config.partition}
-#SBATCH --nodes=1
-#SBATCH --cpus-per-task=4
-#SBATCH --gpus={self.config.gpus_per_job}
-#SBATCH --mem={self.config.mem_gb}G
-#SBATCH --time={self.config.time_limit}
-#SBATCH --output={self.base_dir}/logs/{job_name}_%j.out
-#SBATCH --error={self.base_dir}/logs/{job_name}_%j.err
-#SBATCH --mail-type=END,FAIL
-{account_line}
-{qos_line}
-
-set -euo pipefail
-
-module load apptainer
-
-export HF_TOKEN="{self.hf_token}"
-export PYTHONUNBUFFERED=1
-
-REPO_ROOT="{repo_root}"
-BASE_DIR="{self.base_dir}"
-SPEAKER_DIR="{speaker_folder}"
-WHISPERX_IMAGE="{whisperx_image}"
-OLLAMA_IMAGE="{ollama_image}"
-OLLAMA_MODEL="{model_name}"
-
-mkdir -p "$BASE_DIR/logs"
-
-# Run WhisperX transcription
-apptainer exec --nv \
-  --env LD_LIBRARY_PATH=/usr/local/lib/python3.10/dist-packages/nvidia/cudnn/lib \
-  --bind "$REPO_ROOT:$REPO_ROOT" \
-  --bind "$BASE_DIR:$BASE_DIR" \
-  "$WHISPERX_IMAGE" \
-  python3 "$REPO_ROOT/transcribe_calls.py" "$SPEAKER_DIR" --device cuda
-
-# Launch Ollama-backed analysis
-apptainer exec --nv \
-  --bind "$REPO_ROOT:$REPO_ROOT" \
-  --bind "$BASE_DIR:$BASE_DIR" \
-  --bind "$HOME/.ollama:$HOME/.ollama" \
-  "$OLLAMA_IMAGE" \
-  bash <<ANALYZE
-set -eo pipefail
-export OLLAMA_HOST="127.0.0.1:11434"
-export no_proxy="localhost,127.0.0.1"
-export NO_PROXY="localhost,127.0.0.1"
-unset http_proxy
-unset https_proxy
-unset HTTP_PROXY
-unset HTTPS_PROXY
-
-# Start Ollama server with proper error handling
-ollama serve >/tmp/ollama.log 2>&1 &
-OLLAMA_PID=\\$!
-set -u
-
-# Check if Ollama started successfully
-if [[ -n "\\$OLLAMA_PID" ]] && kill -0 "\\$OLLAMA_PID" 2>/dev/null; then
-    echo "Ollama server started with PID: \\$OLLAMA_PID"
-    trap 'kill \\$OLLAMA_PID 2>/dev/null || true' EXIT
-
-    # Wait for Ollama to be ready (up to 60 seconds)
-    echo "Waiting for Ollama server to be ready..."
-    for i in {{1..12}}; do
-        if curl -s http://127.0.0.1:11434/api/tags >/dev/null 2>&1; then
-            echo "Ollama server is ready"
-            break
-        fi
-        echo "  Attempt \\$i/12: waiting..."
-        sleep 5
-    done
-
-    # Check if model exists, pull only if necessary
-    echo "Checking for model: $OLLAMA_MODEL"
-    if ! ollama list | grep -q "$OLLAMA_MODEL"; then
-        echo "Model not found, pulling: $OLLAMA_MODEL"
-        ollama pull "$OLLAMA_MODEL"
-    else
-        echo "Model already available: $OLLAMA_MODEL"
-    fi
-
-    # Verify model is in the list
-    ollama list
-
-    # Warm up the model with a test request to load it into GPU memory
-    echo "Warming up model..."
-    echo '{{"model": "$OLLAMA_MODEL", "prompt": "Hello", "stream": false}}' | \
-        curl -s -X POST http://127.0.0.1:11434/api/generate -d @- > /dev/null
-    echo "Model warmed up and ready"
-
-    # Run the analysis
-    python3 "$REPO_ROOT/analyze_with_ollama.py" "$SPEAKER_DIR" --model "$OLLAMA_MODEL"
-else
-    echo "Failed to start Ollama server, skipping analysis" >&2
-    exit 1
-fi
-ANALYZE
-
-echo "Pipeline completed for {speaker_folder.name}"
-"""
-        script_path.write_text(script, encoding="utf-8")
-        script_path.chmod(0o755)
-        return script_path
+            return f"{self.config.account}-gpu-{gpu_type}"
+        return None
+
+    def build_sbatch_command(self) -> List[str]:
+        """sbatch options for the checked-in pipeline.slurm array job."""
+        array_spec = f"0-{len(self.speaker_folders) - 1}"
+        if self.config.max_concurrent_tasks:
+            array_spec += f"%{self.config.max_concurrent_tasks}"
+        log_stem = self.base_dir / "logs" / f"{ARRAY_JOB_NAME}_%A_%a"
+
+        command = [
+            self.sbatch or "sbatch",
+            f"--job-name={ARRAY_JOB_NAME}",
+            f"--partition={self.config.partition}",
+            f"--gpus={self.config.gpus_per_job}",
+            f"--mem={self.config.mem_gb}G",
+            f"--time={self.config.time_limit}",
+            f"--array={array_spec}",
+            f"--output={log_stem}.out",
+            f"--error={log_stem}.err",
+            "--export=ALL",
+        ]
+        if self.config.account:
+            command.append(f"--account={self.config.account}")
+        qos = self.resolve_qos()
+        if qos:
+            command.append(f"--qos={qos}")
+        command.append(str(self.config.repo_root / PIPELINE_SCRIPT))
+        return command
+
+    def job_environment(self, manifest_path: Path) -> dict:
+        # Settings travel in the environment (exported with --export=ALL), so paths
+        # containing commas or quotes need no escaping.
+        env = os.environ.copy()
+        env.update(
+            HF_TOKEN=self.hf_token,
+            REPO_ROOT=str(self.config.repo_root),
+            BASE_DIR=str(self.base_dir),
+            MANIFEST=str(manifest_path),
+            WHISPERX_IMAGE=str(self.config.whisperx_image),
+            OLLAMA_IMAGE=str(self.config.ollama_image),
+            OLLAMA_MODEL=self.config.ollama_model,
+            OLLAMA_MODELS=str(self.config.ollama_models),
+        )
+        return env
 
     # --- Job submission -------------------------------------------------------------
 
-    def submit_slurm_job(self, script_path: Path) -> Optional[str]:
-        env = os.environ.copy()
-        env["HF_TOKEN"] = self.hf_token
+    def submit_slurm_job(self, manifest_path: Path) -> Optional[str]:
         try:
             result = subprocess.run(
-                ["sbatch", str(script_path)],
+                self.build_sbatch_command(),
                 capture_output=True,
                 text=True,
                 check=True,
-                env=env,
+                env=self.job_environment(manifest_path),
             )
         except subprocess.CalledProcessError as exc:
-            print(f"Failed to submit {script_path.name}: {exc.stderr.strip()}")
+            print(f"Failed to submit {PIPELINE_SCRIPT}: {exc.stderr.strip()}")
             return None
         job_id = result.stdout.strip().split()[-1]
-        print(f"  Submitted job {job_id} for {script_path.stem}")
+        print(f"  Submitted job {job_id} for {ARRAY_JOB_NAME}")
         return job_id
 
     # --- Job monitoring -------------------------------------------------------------
@@ -234,85 +283,158 @@ echo "Pipeline completed for {speaker_folder.name}"
             return
 
         user = os.environ.get("USER", "")
+        job_list = ",".join(self.job_ids)
+        # squeue output is compared as raw bytes, so each poll skips text decoding.
+        job_keys = [(job, job.encode()) for job in self.job_ids]
         print(f"Monitoring jobs: {', '.join(self.job_ids)}")
+        interval = POLL_MIN_SECONDS
+        previous: List[bytes] = []
+        last_user_listing = float("-inf")
         while True:
-            remaining = []
-            for job in self.job_ids:
-                probe = subprocess.run(
-                    ["squeue", "-j", job, "--noheader"],
-                    capture_output=True,
-                    text=True,
-                )
-                if probe.returncode == 0 and probe.stdout.strip():
-                    remaining.append(job)
+            # One squeue call covers every job; finished jobs drop out of the listing.
+            # %F reports the array's base job ID for each of its pending/running tasks.
+            probe = subprocess.run(
+                [self.squeue, "-j", job_list, "--noheader", "-o", "%F"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+            listing = sorted(probe.stdout.split()) if probe.returncode == 0 else []
+            active = set(listing)
+            remaining = [job for job, key in job_keys if key in active]
             if not remaining:
                 print("All jobs have completed")
                 return
             print(f"  Still running: {', '.join(remaining)}")
-            if user:
-                subprocess.run(["squeue", "-u", user])
-            time.sleep(180)
+            if user and time.monotonic() - last_user_listing >= USER_QUEUE_EVERY_SECONDS:
+                subprocess.run([self.squeue, "-u", user])
+                last_user_listing = time.monotonic()
+
+            # Back off while nothing changes; array tasks starting or finishing change
+            # the listing, so poll quickly again when the end may be near.
+            if listing != previous:
+                interval = POLL_MIN_SECONDS
+            previous = listing
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_MAX_SECONDS)
 
     # --- Result organisation --------------------------------------------------------
 
-    def organise_results(self, speaker_folder: Path) -> None:
+    def organise_results(self, speaker_folder: Path) -> List[Tuple[Path, Path]]:
+        """Sort calls into review folders and return the (src, dst) file copies to make."""
+        # One directory read answers every "does this call file exist?" question below.
+        with os.scandir(speaker_folder) as entries:
+            existing = {entry.name for entry in entries if entry.is_file()}
+
         results_path = speaker_folder / "analysis_results.json"
-        if not results_path.exists():
+        if results_path.name not in existing:
             print(f"No analysis results for {speaker_folder.name}; skipping organisation")
-            return
-        with results_path.open("r", encoding="utf-8") as handle:
-            results = json.load(handle)
+            return []
 
         needs_attention = speaker_folder / "needs_further_attention"
         reviewed = speaker_folder / "reviewed"
         needs_attention.mkdir(exist_ok=True)
         reviewed.mkdir(exist_ok=True)
 
-        for transcription_file, payload in results.items():
-            score = int(payload.get("score", 0))
-            audio_name = payload.get("audio_file", transcription_file)
-            audio_path = speaker_folder / audio_name
-            call_id = Path(audio_name).stem
-            destination_root = needs_attention if score < self.score_threshold else reviewed
-            target_dir = destination_root / call_id
-            target_dir.mkdir(parents=True, exist_ok=True)
+        copies: List[Tuple[Path, Path]] = []
+        with results_path.open("rb") as results:
+            for transcription_file, payload in self._iter_results(results):
+                score = int(payload.get("score", 0))
+                audio_name = payload.get("audio_file", transcription_file)
+                audio_path = speaker_folder / audio_name
+                call_id = Path(audio_name).stem
+                destination_root = needs_attention if score < self.score_threshold else reviewed
+                target_dir = destination_root / call_id
+                target_dir.mkdir(parents=True, exist_ok=True)
+
+                if audio_name in existing:
+                    copies.append((audio_path, target_dir / audio_path.name))
+                for suffix in (".vtt", ".srt", ".txt", ".json"):
+                    candidate_name = f"{call_id}{suffix}"
+                    if candidate_name in existing:
+                        copies.append((speaker_folder / candidate_name, target_dir / candidate_name))
+
+                per_call_results = target_dir / "analysis_results.json"
+                with per_call_results.open("w", encoding="utf-8") as handle:
+                    json.dump({transcription_file: payload}, handle, indent=2)
 
-            self._copy_if_exists(audio_path, target_dir / audio_path.name)
-            for suffix in (".vtt", ".srt", ".txt", ".json"):
-                candidate = speaker_folder / f"{call_id}{suffix}"
-                self._copy_if_exists(candidate, target_dir / candidate.name)
+        print(f"Organised results for {speaker_folder.name}")
+        return copies
 
-            per_call_results = target_dir / "analysis_results.json"
-            with per_call_results.open("w", encoding="utf-8") as handle:
-                json.dump({transcription_file: payload}, handle, indent=2)
+    @staticmethod
+    def _iter_results(handle):
+        """Yield (transcription file, payload) pairs, streaming when ijson is installed."""
+        if ijson is not None:
+            return ijson.kvitems(handle, "", use_float=True)
+        return json.load(handle).items()
+
+    def copy_files(self, copies: List[Tuple[Path, Path]]) -> None:
+        print(f"Copying {len(copies)} files into review folders")
+        # Copies are latency-bound on the shared filesystem, so overlap them.
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
+            list(executor.map(lambda pair: self._link_or_copy(*pair), copies))
 
-        print(f"Organised results for {speaker_folder.name}")
+    @staticmethod
+    def _link_or_copy(src: Path, dst: Path) -> None:
+        # A hard link is O(1) when src and dst share a filesystem; copy otherwise.
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            if not os.path.samefile(src, dst):
+                SpeakerAnalysisOrchestrator._copy_file(src, dst)
+        except OSError:
+            SpeakerAnalysisOrchestrator._copy_file(src, dst)
+
+    @staticmethod
+    def _copy_file(src: Path, dst: Path) -> None:
+        if src.suffix.lower() in AUDIO_SET:
+            SpeakerAnalysisOrchestrator._fast_copy(src, dst)
+        else:
+            shutil.copy2(src, dst)
 
     @staticmethod
-    def _copy_if_exists(src: Path, dst: Path) -> None:
-        if src.exists() and src.is_file():
+    def _fast_copy(src: Path, dst: Path) -> None:
+        """Copy large audio via copy_file_range, which reflinks on XFS/Btrfs."""
+        try:
+            with src.open("rb") as source, dst.open("wb") as target:
+                remaining = os.fstat(source.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(source.fileno(), target.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            shutil.copystat(src, dst)
+        except (AttributeError, OSError):
+            # copy_file_range is Linux-only and not every filesystem supports it.
             shutil.copy2(src, dst)
 
     # --- High level orchestration ---------------------------------------------------
 
     def run(self) -> None:
+        if self.sbatch is None:
+            raise SystemExit("sbatch not found on PATH; run this from a SLURM login node")
         self.base_dir.mkdir(parents=True, exist_ok=True)
         (self.base_dir / "logs").mkdir(exist_ok=True)
         self.discover_speaker_folders()
         if not self.speaker_folders:
             print("No speaker folders discovered; exiting")
             return
+        if not self.ensure_ollama_model():
+            print("Not submitting: every job would stop at the Ollama model check")
+            return
 
-        for speaker_folder in self.speaker_folders:
-            script = self.create_slurm_job_script(speaker_folder)
-            job_id = self.submit_slurm_job(script)
-            if job_id:
-                self.job_ids.append(job_id)
+        manifest = self.write_speaker_manifest()
+        job_id = self.submit_slurm_job(manifest)
+        if job_id:
+            print(f"  Array job {job_id} covers {len(self.speaker_folders)} speaker folders")
+            self.job_ids.append(job_id)
 
         self.monitor_jobs()
 
+        copies: List[Tuple[Path, Path]] = []
         for folder in self.speaker_folders:
-            self.organise_results(folder)
+            copies.extend(self.organise_results(folder))
+        self.copy_files(copies)
 
 
 # ------------------------------------------------------------------------------------
@@ -351,6 +473,12 @@ def parse_arguments() -> argparse.Namespace:
         default=os.environ.get("OLLAMA_MODEL", "deepseek-r1:32b"),
         help="Model name expected to exist inside the Ollama image",
     )
+    parser.add_argument(
+        "--ollama-models",
+        type=Path,
+        default=os.environ.get("OLLAMA_MODELS", str(Path.home() / ".ollama" / "models")),
+        help="Shared Ollama model store, pulled into once and mounted read-only by jobs",
+    )
     parser.add_argument(
         "--partition",
         default=DEFAULT_GPU_PARTITION,
@@ -383,6 +511,12 @@ def parse_arguments() -> argparse.Namespace:
         default=None,
         help="SLURM QoS (Quality of Service) - omit if your cluster doesn't use QoS",
     )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=None,
+        help="Maximum speaker folders processed at once (array task throttle)",
+    )
     return parser.parse_args()
 
 
@@ -404,12 +538,14 @@ def main() -> None:
         whisperx_image=whisperx_image,
         ollama_image=ollama_image,
         ollama_model=args.ollama_model,
+        ollama_models=Path(args.ollama_models).expanduser().resolve(),
         partition=args.partition,
         gpus_per_job=args.gpus,
         mem_gb=args.mem,
         time_limit=args.time_limit,
         account=args.account,
         qos=args.qos,
+        max_concurrent_tasks=args.max_concurrent,
     )
 
     orchestrator = SpeakerAnalysisOrchestrator(base_dir, args.hf_token, args.threshold, config)
@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
-"""Batch transcription helper for WhisperX."""
+"""Batch transcription helper for WhisperX.
+
+The WhisperX model is loaded once per invocation and reused for every audio file
+in the folder, instead of starting a fresh interpreter (and model load) per call.
+"""
 
 from __future__ import annotations
 
 import argparse
-import subprocess
-import sys
+import importlib.util
+import os
+import traceback
 from pathlib import Path
+from types import ModuleType
 from typing import Iterable
 
 AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".flac", ".ogg", ".wmv", ".avi", ".mp4")
+AUDIO_SET = frozenset(AUDIO_EXTENSIONS)
 
 SCRIPT_ROOT = Path(__file__).resolve().parent
 WHISPERX_SCRIPT = SCRIPT_ROOT / "whisperx_script.py"
@@ -35,40 +42,81 @@ def parse_args() -> argparse.Namespace:
         default=WHISPERX_SCRIPT,
         help="Path to the single-file transcription script",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-transcribe audio files that already have a .vtt transcript",
+    )
     parser.add_argument(
         "--extra-args",
         nargs=argparse.REMAINDER,
         default=[],
-        help="Additional arguments forwarded to whisperx_script.py",
+        help="Additional whisperx_script.py options (e.g. --no-diarization)",
     )
     return parser.parse_args()
 
 
 def discover_audio_files(folder: Path) -> list[Path]:
-    files: list[Path] = []
-    for extension in AUDIO_EXTENSIONS:
-        files.extend(folder.glob(f"*{extension}"))
-    return sorted({file.resolve() for file in files})
+    # One directory read; callers pass an already-resolved folder.
+    with os.scandir(folder) as entries:
+        files = [
+            Path(entry.path)
+            for entry in entries
+            if entry.is_file()
+            and os.path.splitext(entry.name)[1].lower() in AUDIO_SET
+        ]
+    return sorted(files)
+
+
+def load_whisperx_script(script_path: Path) -> ModuleType:
+    spec = importlib.util.spec_from_file_location("whisperx_script", script_path)
+    if spec is None or spec.loader is None:
+        raise SystemExit(f"Unable to load {script_path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_transcription(
+    audio_files: Iterable[Path],
+    script_path: Path,
+    device: str,
+    extra_args: list[str],
+    force: bool = False,
+) -> None:
+    audio_files = list(audio_files)
+    whisperx_script = load_whisperx_script(script_path)
+    # Reuse the script's own parser so --extra-args keep their existing meaning.
+    options = whisperx_script.parse_args(
+        [str(audio_file) for audio_file in audio_files]
+        + ["--device", device]
+        + (["--force"] if force else [])
+        + extra_args
+    )
+
+    audio_files = whisperx_script.pending_audio_files(audio_files, options)
+    if not audio_files:
+        print("All transcripts already exist; use --force to regenerate them")
+        return
 
+    print(f"Loading WhisperX models on {device} ...")
+    model, diarization_model = whisperx_script.load_models(options)
 
-def run_transcription(audio_files: Iterable[Path], script_path: Path, device: str, extra_args: list[str]) -> None:
-    python_exec = Path(sys.executable)
     for audio_file in audio_files:
         print(f"Transcribing {audio_file.name} ...")
-        cmd = [
-            str(python_exec),
-            str(script_path),
-            str(audio_file),
-            "--device",
-            device,
-        ] + extra_args
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if result.returncode != 0:
+        output_dir = (options.output_dir or audio_file.parent).expanduser().resolve()
+        try:
+            whisperx_script.transcribe_one(
+                model,
+                diarization_model,
+                audio_file,
+                audio_file.parent.name,
+                output_dir,
+                batch_size=options.batch_size,
+            )
+        except Exception:
             print(f"  Transcription failed for {audio_file.name}")
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
+            traceback.print_exc()
         else:
             print(f"  Completed {audio_file.name}")
 
@@ -88,7 +136,7 @@ def main() -> None:
     if not audio_files:
         raise SystemExit(f"No audio files discovered in {speaker_folder}")
 
-    run_transcription(audio_files, script_path, args.device, args.extra_args)
+    run_transcription(audio_files, script_path, args.device, args.extra_args, force=args.force)
 
     vtt_files = sorted(speaker_folder.glob("*.vtt"))
     print(f"Generated {len(vtt_files)} VTT files in {speaker_folder}")
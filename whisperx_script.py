@@ -2,19 +2,24 @@
 """
 WhisperX transcription entry point.
 
-This script performs ASR and (optionally) diarization for a single audio
-recording, then stores a WebVTT transcript with speaker labels. It is intended
-to run inside the `whisperx_python.sif` container where WhisperX and its
-dependencies are available.
+This script performs ASR and (optionally) diarization for one or more audio
+recordings, then stores a WebVTT transcript with speaker labels next to each.
+The WhisperX model is loaded once and reused for every file; callers such as
+`transcribe_calls.py` can import `load_models` and `transcribe_one` to do the
+same in-process. It is intended to run inside the `whisperx_python.sif`
+container where WhisperX and its dependencies are available.
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
+import io
 import os
+import re
 import sys
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Sequence
 
 try:
     import whisperx  # type: ignore
@@ -77,10 +82,22 @@ SHORT_RESPONSES: tuple[str, ...] = (
     "false",
 )
 
+# One compiled alternation per keyword list, so each segment is scanned once in C.
+# SHORT_RE is anchored but, like the original startswith() check, not word-bounded.
+AGENT_RE = re.compile("|".join(re.escape(keyword) for keyword in AGENT_KEYWORDS))
+USER_RE = re.compile("|".join(re.escape(phrase) for phrase in USER_PHRASES))
+SHORT_RE = re.compile("|".join(re.escape(response) for response in SHORT_RESPONSES))
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Transcribe a single audio file with WhisperX")
-    parser.add_argument("audio_file", type=Path, help="Path to the audio file to transcribe")
+# int8 weights with float16 activations roughly halve weight bandwidth on the GPU;
+# batch 32 keeps a 24 GB RTX 6000 busy with large-v2.
+GPU_COMPUTE_TYPE = "int8_float16"
+CPU_COMPUTE_TYPE = "float32"
+DEFAULT_BATCH_SIZE = 32
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Transcribe audio files with WhisperX")
+    parser.add_argument("audio_files", type=Path, nargs="+", help="Audio files to transcribe")
     parser.add_argument(
         "--device",
         default="cuda",
@@ -102,7 +119,36 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Disable diarization even if models are available",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--compute-type",
+        default=None,
+        help=f"faster-whisper compute type (default: {GPU_COMPUTE_TYPE} on GPU, {CPU_COMPUTE_TYPE} on CPU)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Audio chunks decoded per GPU batch (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--beam-size",
+        type=int,
+        default=None,
+        help="Decoder beam width; 1 selects greedy decoding (default: WhisperX's 5)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-transcribe files that already have a VTT transcript",
+    )
+    return parser.parse_args(argv)
+
+
+def load_asr_model(device: str, compute_type: Optional[str] = None, beam_size: Optional[int] = None):
+    if compute_type is None:
+        compute_type = GPU_COMPUTE_TYPE if device != "cpu" else CPU_COMPUTE_TYPE
+    asr_options = {"beam_size": beam_size} if beam_size else None
+    return whisperx.load_model("large-v2", device, compute_type=compute_type, asr_options=asr_options)
 
 
 def load_diarization_model(device: str):
@@ -113,16 +159,27 @@ def load_diarization_model(device: str):
         hf_token = os.environ.get("HF_TOKEN")
         if not hf_token:
             return None
-        return whisperx.DiarizationPipeline(use_auth_token=hf_token, device=device)
+        import torch  # installed alongside WhisperX
+
+        return whisperx.DiarizationPipeline(use_auth_token=hf_token, device=torch.device(device))
     except Exception:
         return None
 
 
-def select_agent_speaker(segments: Iterable[dict]) -> Optional[str]:
-    for segment in segments:
+def lowered_text(segment: dict) -> str:
+    return (segment.get("text") or "").strip().lower()
+
+
+def select_agent_speaker(
+    segments: Iterable[dict],
+    lowered_texts: Optional[Sequence[str]] = None,
+) -> Optional[str]:
+    segments = list(segments)
+    if lowered_texts is None:
+        lowered_texts = [lowered_text(segment) for segment in segments]
+    for segment, text in zip(segments, lowered_texts):
         speaker = segment.get("speaker")
-        text = (segment.get("text") or "").lower()
-        if speaker and any(keyword in text for keyword in AGENT_KEYWORDS):
+        if speaker and AGENT_RE.search(text):
             return speaker
     return None
 
@@ -131,16 +188,17 @@ def classify_segment(
     segment: dict,
     agent_name: str,
     agent_speaker: Optional[str],
+    lower_text: Optional[str] = None,
 ) -> str:
-    text = (segment.get("text") or "").strip()
     speaker = segment.get("speaker")
-    lower_text = text.lower()
+    if lower_text is None:
+        lower_text = lowered_text(segment)
 
-    if any(keyword in lower_text for keyword in AGENT_KEYWORDS):
+    if AGENT_RE.search(lower_text):
         return agent_name
-    if any(phrase in lower_text for phrase in USER_PHRASES):
+    if USER_RE.search(lower_text):
         return "user"
-    if len(lower_text) <= 30 and any(lower_text.startswith(resp) for resp in SHORT_RESPONSES):
+    if len(lower_text) <= 30 and SHORT_RE.match(lower_text):
         return "user"
     if speaker and speaker == agent_speaker:
         return agent_name
@@ -150,7 +208,9 @@ def classify_segment(
 
 
 def build_vtt_content(segments: Iterable[dict], agent_name: str) -> str:
-    lines = ["WEBVTT", ""]
+    # Each cue is written with its leading blank line, so the output needs no final strip.
+    buffer = io.StringIO()
+    buffer.write("WEBVTT\n")
     for segment in segments:
         start = segment.get("start")
         end = segment.get("end")
@@ -160,59 +220,100 @@ def build_vtt_content(segments: Iterable[dict], agent_name: str) -> str:
             continue
         start_ts = seconds_to_timestamp(float(start))
         end_ts = seconds_to_timestamp(float(end))
-        lines.append(f"{start_ts} --> {end_ts}")
-        lines.append(f"[{speaker or agent_name}] {text}")
-        lines.append("")
-    return "\n".join(lines).rstrip() + "\n"
+        buffer.write(f"\n{start_ts} --> {end_ts}\n[{speaker or agent_name}] {text}\n")
+    return buffer.getvalue()
 
 
+@functools.lru_cache(maxsize=4096)
 def seconds_to_timestamp(seconds: float) -> str:
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    remaining = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{remaining:06.3f}"
+    # Round once to whole milliseconds, then split with integer divmod; a segment's
+    # end is usually the next one's start, so the cache serves about half the calls.
+    milliseconds = int(seconds * 1000 + 0.5)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
 
 
 def label_segments(segments: list[dict], agent_name: str) -> list[dict]:
-    agent_speaker = select_agent_speaker(segments)
+    # Lowercase each segment once; both the speaker pick and the per-segment pass reuse it.
+    lowered_texts = [lowered_text(segment) for segment in segments]
+    agent_speaker = select_agent_speaker(segments, lowered_texts)
     labeled_segments: list[dict] = []
-    for segment in segments:
-        speaker_label = classify_segment(segment, agent_name, agent_speaker)
+    for segment, lower_text in zip(segments, lowered_texts):
+        speaker_label = classify_segment(segment, agent_name, agent_speaker, lower_text)
         labeled_segments.append({**segment, "speaker_label": speaker_label})
     return labeled_segments
 
 
-def main() -> None:
-    args = parse_args()
+def transcript_path(audio_file: Path, output_dir: Optional[Path]) -> Path:
+    return (output_dir or audio_file.parent).expanduser().resolve() / f"{audio_file.stem}.vtt"
 
-    audio_file: Path = args.audio_file.expanduser().resolve()
-    if not audio_file.exists():
-        raise SystemExit(f"Audio file not found: {audio_file}")
 
-    agent_name = audio_file.parent.name
-    output_dir = (args.output_dir or audio_file.parent).expanduser().resolve()
-    output_dir.mkdir(parents=True, exist_ok=True)
+def pending_audio_files(audio_files: Iterable[Path], args: argparse.Namespace) -> list[Path]:
+    """Drop files whose non-empty VTT already exists, unless --force was given."""
+    if args.force:
+        return list(audio_files)
+    pending: list[Path] = []
+    for audio_file in audio_files:
+        output_path = transcript_path(audio_file, args.output_dir)
+        if output_path.is_file() and output_path.stat().st_size:
+            print(f"Skipping {audio_file.name}: {output_path.name} already exists")
+            continue
+        pending.append(audio_file)
+    return pending
 
-    print(f"Processing: {audio_file}")
-    print(f"Agent name: {agent_name}")
-    print(f"Using device: {args.device}")
 
-    model = whisperx.load_model("large-v2", args.device, compute_type="float16" if args.device != "cpu" else "float32")
+def write_transcript(output_path: Path, content: str) -> None:
+    """Encode once and write with raw os.write calls, then swap the file into place.
+
+    The rename means an interrupted run never leaves a truncated VTT that a later
+    run would mistake for a finished transcript.
+    """
+    data = memoryview(content.encode("utf-8"))
+    temp_path = output_path.with_name(f"{output_path.name}.tmp")
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+    os.replace(temp_path, output_path)
+
+
+def load_models(args: argparse.Namespace):
+    """Load the ASR model and, when enabled and available, the diarization pipeline.
+
+    Both are loaded once per process and reused for every file.
+    """
+    if args.device != "cpu":
+        import torch  # installed alongside WhisperX
+
+        # Pyannote runs fixed-size windows, so autotuned cuDNN kernels are reused across calls.
+        torch.backends.cudnn.benchmark = True
+    model = load_asr_model(args.device, args.compute_type, args.beam_size)
+    diarization_model = None if args.no_diarization else load_diarization_model(args.device)
+    return model, diarization_model
+
+
+def transcribe_one(
+    model,
+    diarization_model,
+    audio_file: Path,
+    agent_name: str,
+    output_dir: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Path:
+    """Transcribe one recording with preloaded models and write its VTT file."""
     audio = whisperx.load_audio(str(audio_file))
 
-    result = model.transcribe(audio, batch_size=16)
-    segments = result.get("segments", [])
+    result = model.transcribe(audio, batch_size=batch_size)
 
-    diarization_allowed = not args.no_diarization
-    diarization_requested = args.diarization or not args.no_diarization
     diarize_segments = None
-
-    if diarization_requested and diarization_allowed:
-        diarization_model = load_diarization_model(args.device)
-        if diarization_model is not None:
-            print("Running diarization...")
-            diarize_segments = diarization_model(audio, min_speakers=1, max_speakers=2)
-            result = whisperx.assign_word_speakers(diarize_segments, result)
+    if diarization_model is not None:
+        print("Running diarization...")
+        diarize_segments = diarization_model(audio, min_speakers=1, max_speakers=2)
+        result = whisperx.assign_word_speakers(diarize_segments, result)
 
     if diarize_segments is None:
         print("Diarization unavailable; falling back to keyword heuristics")
@@ -220,9 +321,38 @@ def main() -> None:
     labeled_segments = label_segments(result.get("segments", []), agent_name)
     vtt_content = build_vtt_content(labeled_segments, agent_name)
 
+    output_dir.mkdir(parents=True, exist_ok=True)
     output_path = output_dir / f"{audio_file.stem}.vtt"
-    output_path.write_text(vtt_content, encoding="utf-8")
-    print(f"Saved transcription to {output_path}")
+    write_transcript(output_path, vtt_content)
+    return output_path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+
+    audio_files = [path.expanduser().resolve() for path in args.audio_files]
+    missing = [path for path in audio_files if not path.exists()]
+    if missing:
+        raise SystemExit(f"Audio file not found: {missing[0]}")
+
+    audio_files = pending_audio_files(audio_files, args)
+    if not audio_files:
+        print("All transcripts already exist; use --force to regenerate them")
+        return
+
+    print(f"Using device: {args.device}")
+    model, diarization_model = load_models(args)
+
+    for audio_file in audio_files:
+        agent_name = audio_file.parent.name
+        output_dir = (args.output_dir or audio_file.parent).expanduser().resolve()
+
+        print(f"Processing: {audio_file}")
+        print(f"Agent name: {agent_name}")
+        output_path = transcribe_one(
+            model, diarization_model, audio_file, agent_name, output_dir, batch_size=args.batch_size
+        )
+        print(f"Saved transcription to {output_path}")
 
 
 if __name__ == "__main__":